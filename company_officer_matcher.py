@@ -8,6 +8,50 @@ from multiprocessing import Pool, cpu_count
 import warnings
 warnings.filterwarnings('ignore')
 
+# Pre-compiled patterns (compiling once at import beats the re cache lookup
+# that would otherwise happen on every row)
+_SUFFIX_RE = re.compile(r'\b(LLC|L\.?L\.?C\.?|INC\.?|CORP(ORATION)?|LTD|LIMITED|L\.?P\.?|PLLC|P\.?L\.?L\.?C\.?|P\.?A\.?|P\.?C\.?|CO(MPANY)?)\s*$')
+_NONWORD_RE = re.compile(r'[^\w\s]')
+_SUITE_RE = re.compile(r'\b(SUITE|STE|APT|UNIT|#)\s*[\d\w]+')
+_ZIP5_RE = re.compile(r'(\d{5})')
+_CSZ_RE = re.compile(r'^([^,]+)[,\s]+([A-Z]{2})\s+(\d{5})')
+
+# RapidFuzz scores the fuzzy candidates in C++/SIMD; fall back to the
+# pure-Python fast_similarity when it is not installed
+try:
+    from rapidfuzz import fuzz as _rf_fuzz, process as _rf_process
+except ImportError:
+    _rf_fuzz = None
+    _rf_process = None
+
+# Worker-side handle for multiprocessing: the matcher (with its prebuilt
+# indexes and officer frame) is pickled once per worker via the pool
+# initializer instead of once per task
+_worker_matcher = None
+
+def _init_worker(matcher):
+    global _worker_matcher
+    _worker_matcher = matcher
+
+def _run_chunk_in_worker(args):
+    return _worker_matcher.process_company_chunk(args)
+
+def _write_frame_rows(writer, frame, sheet_name):
+    """Write a DataFrame to a worksheet strictly top-down
+
+    constant_memory flushes a row as soon as a later one is touched and
+    drops writes to flushed rows, while to_excel emits cells
+    column-by-column - combined they keep only the first column. Going
+    through write_row puts the data out in the order the streaming
+    writer needs.
+    """
+    worksheet = writer.book.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, [str(col) for col in frame.columns])
+    for row_num, row in enumerate(frame.itertuples(index=False), start=1):
+        worksheet.write_row(row_num, 0,
+                            ['' if pd.isna(value) else value for value in row])
+    return worksheet
+
 class EfficientCompanyMatcher:
     """Optimized company-officer matching with chunked processing"""
     
@@ -25,14 +69,21 @@ class EfficientCompanyMatcher:
         name = str(name).upper().strip()
         
         # Remove common suffixes with single regex
-        name = re.sub(r'\b(LLC|L\.?L\.?C\.?|INC\.?|CORP(ORATION)?|LTD|LIMITED|L\.?P\.?|PLLC|P\.?L\.?L\.?C\.?|P\.?A\.?|P\.?C\.?|CO(MPANY)?)\s*$', '', name)
+        name = _SUFFIX_RE.sub('', name)
         
         # Clean special characters and normalize spaces in one pass
-        name = re.sub(r'[^\w\s]', ' ', name)
+        name = _NONWORD_RE.sub(' ', name)
         name = ' '.join(name.split())
         
         return name
-    
+
+    def clean_company_name_series(self, series):
+        """Vectorized clean_company_name for a whole pandas Series"""
+        s = series.fillna('').astype(str).str.upper().str.strip()
+        s = s.str.replace(_SUFFIX_RE, '', regex=True)
+        s = s.str.replace(_NONWORD_RE, ' ', regex=True)
+        return s.str.replace(r'\s+', ' ', regex=True).str.strip()
+
     def fast_similarity(self, str1, str2):
         """Fast similarity calculation using simple ratio"""
         if not str1 or not str2:
@@ -60,100 +111,118 @@ class EfficientCompanyMatcher:
         
         # Weighted average
         return (jaccard * 0.7 + len_sim * 0.3)
-    
-    def parse_address_components(self, row):
-        """Efficiently parse address components"""
-        result = {
-            'clean_address': '',
-            'clean_city': '',
-            'clean_state': '',
-            'clean_zip': ''
-        }
-        
-        # Parse address
-        if pd.notna(row.get('address')):
-            addr = str(row['address']).upper().strip()
-            # Quick cleanup - remove suite info
-            addr = re.sub(r'\b(SUITE|STE|APT|UNIT|#)\s*[\d\w]+', '', addr)
-            result['clean_address'] = ' '.join(addr.split())
-        
-        # Use pre-parsed fields if available
-        if pd.notna(row.get('city')):
-            result['clean_city'] = str(row['city']).upper().strip()
-        
-        if pd.notna(row.get('state')):
-            result['clean_state'] = str(row['state']).upper().strip()[:2]
-        
-        if pd.notna(row.get('zip_code')):
-            zip_val = str(row['zip_code']).strip()
-            # Extract just 5-digit zip
-            zip_match = re.match(r'(\d{5})', zip_val)
-            if zip_match:
-                result['clean_zip'] = zip_match.group(1)
-        
-        # Fallback to parsing combined field
-        if not result['clean_city'] and pd.notna(row.get('city_state_zip')):
-            csz = str(row['city_state_zip']).strip()
-            # Quick regex parse
-            match = re.search(r'^([^,]+)[,\s]+([A-Z]{2})\s+(\d{5})', csz)
-            if match:
-                result['clean_city'] = match.group(1).strip()
-                result['clean_state'] = match.group(2)
-                result['clean_zip'] = match.group(3)
-        
-        return result
-    
+
+    def fast_similarity_pretokenized(self, str1, tokens1, str2, tokens2):
+        """fast_similarity over pre-built token sets (skips re-splitting
+        the officer name on every comparison)"""
+        if not tokens1 or not tokens2:
+            return 0
+
+        if str1 == str2:
+            return 100
+
+        intersection = tokens1.intersection(tokens2)
+        union = tokens1.union(tokens2)
+
+        jaccard = len(intersection) / len(union) * 100 if union else 0
+        len_sim = min(len(str1), len(str2)) / max(len(str1), len(str2)) * 100
+
+        return (jaccard * 0.7 + len_sim * 0.3)
+
     def process_company_chunk(self, args):
-        """Process a single chunk of companies (for parallel processing)"""
-        chunk_companies, officers_df, chunk_id = args
-        
-        print(f"  Processing chunk {chunk_id} ({len(chunk_companies)} companies)...")
-        
+        """Process a single chunk of companies (serially or in a pool worker)
+
+        Uses the indexes attached by match_companies_efficient:
+        officers_df, company_index, token_index, stop_tokens,
+        officers_clean and officers_tokens.
+        """
+        chunk_companies, chunk_id = args
+
         matched_records = []
-        
+        exact_count = 0
+        fuzzy_count = 0
+        no_match_count = 0
+
         for _, company_row in chunk_companies.iterrows():
             target_company = company_row['Company']
             target_clean = company_row['company_clean']
-            
-            # First try exact match (fastest)
-            exact_matches = officers_df[officers_df['company_clean'] == target_clean]
-            
-            if not exact_matches.empty:
-                # Take first exact match
-                officer = exact_matches.iloc[0]
+
+            # Check exact match using index (O(1) lookup)
+            if target_clean in self.company_index:
+                officer = self.officers_df.loc[self.company_index[target_clean]]
                 matched_records.append(self.create_match_record(
                     target_company, officer, 100, 'EXACT'
                 ))
-            else:
-                # Calculate similarities for all officers (vectorized)
-                officers_df['similarity'] = officers_df['company_clean'].apply(
-                    lambda x: self.fast_similarity(target_clean, x)
-                )
-                
-                # Find best match above threshold
-                best_idx = officers_df['similarity'].idxmax()
-                best_score = officers_df.loc[best_idx, 'similarity']
-                
-                if best_score >= self.match_threshold:
-                    officer = officers_df.loc[best_idx]
-                    matched_records.append(self.create_match_record(
-                        target_company, officer, best_score, 'FUZZY'
-                    ))
+                exact_count += 1
+                continue
+
+            # Fuzzy matching on token-blocked candidates only. Target
+            # tokens go through the same vocab; unseen tokens get fresh
+            # ids (per-process) so the Jaccard union stays honest
+            target_tokens = {self.vocab.setdefault(t, len(self.vocab))
+                             for t in target_clean.split()}
+            candidate_ids = set()
+            for token in target_tokens:
+                if token in self.stop_tokens:
+                    continue
+                candidate_ids.update(self.token_index.get(token, []))
+
+            # Narrow to the company's own state when we know it
+            company_state = str(company_row.get('State', '') or '').strip().upper()
+            if company_state in self.state_ids:
+                candidate_ids &= self.state_ids[company_state]
+
+            best_score = 0
+            best_idx = -1
+            if candidate_ids:
+                candidate_ids = sorted(candidate_ids)
+                if _rf_process is not None:
+                    # Batched C-level scoring of the whole candidate set
+                    scores = _rf_process.cdist(
+                        [target_clean],
+                        [self.officers_clean[i] for i in candidate_ids],
+                        scorer=_rf_fuzz.token_set_ratio,
+                        score_cutoff=self.match_threshold,
+                        dtype=np.uint8
+                    )[0]
+                    pos = int(scores.argmax())
+                    best_idx = candidate_ids[pos]
+                    best_score = float(scores[pos])
                 else:
-                    # No match found
-                    matched_records.append({
-                        'Company': target_company,
-                        'Officer': '',
-                        'Address': '',
-                        'City': '',
-                        'State': '',
-                        'Zip': '',
-                        'Match_Type': 'NO_MATCH',
-                        'Match_Score': 0
-                    })
-        
-        return matched_records
-    
+                    # Bind lookups to locals: inside a hot loop this skips
+                    # the attribute/method resolution on every iteration
+                    sim_fn = self.fast_similarity_pretokenized
+                    officers_clean = self.officers_clean
+                    officers_tokens = self.officers_tokens
+                    for officer_idx in candidate_ids:
+                        score = sim_fn(
+                            target_clean, target_tokens,
+                            officers_clean[officer_idx], officers_tokens[officer_idx]
+                        )
+                        if score > best_score:
+                            best_score = score
+                            best_idx = officer_idx
+
+            if best_idx >= 0 and best_score >= self.match_threshold:
+                matched_records.append(self.create_match_record(
+                    target_company, self.officers_df.loc[best_idx], best_score, 'FUZZY'
+                ))
+                fuzzy_count += 1
+            else:
+                matched_records.append({
+                    'Company': target_company,
+                    'Officer': '',
+                    'Address': '',
+                    'City': '',
+                    'State': '',
+                    'Zip': '',
+                    'Match_Type': 'NO_MATCH',
+                    'Match_Score': 0
+                })
+                no_match_count += 1
+
+        return matched_records, exact_count, fuzzy_count, no_match_count
+
     def create_match_record(self, company_name, officer_data, score, match_type):
         """Create a clean matched record"""
         
@@ -187,101 +256,124 @@ class EfficientCompanyMatcher:
         print("  Cleaning company names...")
         
         # Vectorized cleaning (much faster than apply)
-        officers_df['company_clean'] = officers_df['company_name'].fillna('').astype(str).apply(self.clean_company_name)
-        companies_df['company_clean'] = companies_df['Company'].fillna('').astype(str).apply(self.clean_company_name)
+        officers_df['company_clean'] = self.clean_company_name_series(officers_df['company_name'])
+        companies_df['company_clean'] = self.clean_company_name_series(companies_df['Company'])
+        # Sort the (small) company list up front; chunk results come back
+        # in input order, so the full result frame never needs re-sorting
+        companies_df = companies_df.sort_values('Company', ignore_index=True)
         
         print("  Parsing addresses...")
-        # Parse addresses in batch
-        address_data = []
-        for _, row in officers_df.iterrows():
-            address_data.append(self.parse_address_components(row))
-        
-        address_df = pd.DataFrame(address_data)
-        officers_df = pd.concat([officers_df, address_df], axis=1)
-        
+        # Vectorized address parsing - whole-column string ops instead of
+        # the old per-row iterrows pass
+        empty = pd.Series('', index=officers_df.index)
+
+        if 'address' in officers_df.columns:
+            addr = officers_df['address'].fillna('').astype(str).str.upper()
+            addr = addr.str.replace(_SUITE_RE, '', regex=True)
+            officers_df['clean_address'] = addr.str.replace(r'\s+', ' ', regex=True).str.strip()
+        else:
+            officers_df['clean_address'] = empty
+
+        officers_df['clean_city'] = (officers_df['city'].fillna('').astype(str).str.upper().str.strip()
+                                     if 'city' in officers_df.columns else empty)
+        officers_df['clean_state'] = (officers_df['state'].fillna('').astype(str).str.upper().str.strip().str.slice(0, 2)
+                                      if 'state' in officers_df.columns else empty)
+        officers_df['clean_zip'] = (officers_df['zip_code'].fillna('').astype(str).str.extract(_ZIP5_RE, expand=False).fillna('')
+                                    if 'zip_code' in officers_df.columns else empty)
+
+        # Fall back to the combined field for rows without a parsed city
+        if 'city_state_zip' in officers_df.columns:
+            need_csz = officers_df['clean_city'] == ''
+            if need_csz.any():
+                csz = officers_df.loc[need_csz, 'city_state_zip'].fillna('').astype(str).str.strip().str.extract(_CSZ_RE)
+                officers_df.loc[need_csz, 'clean_city'] = csz[0].str.strip().fillna('')
+                officers_df.loc[need_csz, 'clean_state'] = csz[1].fillna('')
+                officers_df.loc[need_csz, 'clean_zip'] = csz[2].fillna('')
+        
+        # Repeated short values (50 states, ~40k zips) stored once each
+        # instead of one Python string per row
+        for col in ('clean_city', 'clean_state', 'clean_zip'):
+            officers_df[col] = officers_df[col].astype('category')
+
         # Step 2: Create index for exact matching (very fast lookups)
         print("\nStep 2: Building search index...")
-        company_index = {}
-        for idx, row in officers_df.iterrows():
-            clean_name = row['company_clean']
-            if clean_name not in company_index:
-                company_index[clean_name] = []
-            company_index[clean_name].append(idx)
-        
-        # Step 3: Process in chunks
-        print(f"\nStep 3: Matching {len(companies_df)} companies in chunks of {self.chunk_size}...")
-        
-        all_matches = []
+        officers_df = officers_df.reset_index(drop=True)
+        # Single pandas pass: first officer row per cleaned name (the old
+        # iterrows dict-of-lists only ever used the first entry anyway)
+        first_by_clean = officers_df['company_clean'].drop_duplicates(keep='first')
+        company_index = pd.Series(first_by_clean.index.values, index=first_by_clean.values).to_dict()
+        company_index.pop('', None)
+
+        # Token-blocking inverted index: fuzzy matching only scores officers
+        # that share at least one rare token with the target, instead of a
+        # random sample (which could miss real matches)
+        print("  Building token index for fuzzy matching...")
+        officers_clean = officers_df['company_clean'].tolist()
+        # Tokens are interned into integer ids: set intersections on small
+        # ints are several times faster than on strings and use less RAM
+        vocab = {}
+        token_index = {}
+        officers_tokens = []
+        for idx, clean_name in enumerate(officers_clean):
+            token_ids = {vocab.setdefault(t, len(vocab)) for t in clean_name.split()}
+            officers_tokens.append(token_ids)
+            for token_id in token_ids:
+                token_index.setdefault(token_id, []).append(idx)
+
+        # Tokens shared by more than 5% of officers (e.g. GROUP, SERVICES)
+        # produce huge candidate lists without narrowing anything - skip them
+        max_bucket = max(1, int(len(officers_clean) * 0.05))
+        stop_tokens = {t for t, rows in token_index.items() if len(rows) > max_bucket}
+        print(f"  [INDEXED] {len(token_index):,} tokens ({len(stop_tokens)} too common, skipped)")
+
+        # Officer row ids partitioned by state: when the company list
+        # carries a state, fuzzy candidates are intersected with that
+        # partition so we never score against other states' officers
+        if 'clean_state' in officers_df.columns:
+            state_ids = {state: set(rows)
+                         for state, rows in officers_df.groupby('clean_state').groups.items()
+                         if state}
+        else:
+            state_ids = {}
+
+        # Shared state for process_company_chunk; the matcher (and these
+        # indexes) is pickled once per pool worker, not once per chunk
+        self.officers_df = officers_df
+        self.company_index = company_index
+        self.vocab = vocab
+        self.token_index = token_index
+        self.stop_tokens = stop_tokens
+        self.state_ids = state_ids
+        self.officers_clean = officers_clean
+        self.officers_tokens = officers_tokens
+
+        # Step 3: Process in chunks across CPU cores
         num_chunks = (len(companies_df) + self.chunk_size - 1) // self.chunk_size
-        
+        chunk_args = []
         for chunk_id in range(num_chunks):
             start_idx = chunk_id * self.chunk_size
             end_idx = min(start_idx + self.chunk_size, len(companies_df))
-            
-            chunk = companies_df.iloc[start_idx:end_idx]
-            
-            print(f"\nProcessing chunk {chunk_id + 1}/{num_chunks} (companies {start_idx + 1}-{end_idx})...")
-            
-            chunk_matches = []
-            exact_count = 0
-            fuzzy_count = 0
-            no_match_count = 0
-            
-            for _, company_row in chunk.iterrows():
-                target_company = company_row['Company']
-                target_clean = company_row['company_clean']
-                
-                # Check exact match using index (O(1) lookup)
-                if target_clean in company_index:
-                    # Found exact match
-                    officer_idx = company_index[target_clean][0]
-                    officer = officers_df.loc[officer_idx]
-                    chunk_matches.append(self.create_match_record(
-                        target_company, officer, 100, 'EXACT'
-                    ))
-                    exact_count += 1
-                else:
-                    # Need fuzzy matching
-                    best_score = 0
-                    best_officer = None
-                    
-                    # Only check a sample for efficiency
-                    sample_size = min(1000, len(officers_df))
-                    sample_df = officers_df.sample(n=sample_size) if len(officers_df) > sample_size else officers_df
-                    
-                    for _, officer in sample_df.iterrows():
-                        score = self.fast_similarity(target_clean, officer['company_clean'])
-                        if score > best_score and score >= self.match_threshold:
-                            best_score = score
-                            best_officer = officer
-                    
-                    if best_officer is not None:
-                        chunk_matches.append(self.create_match_record(
-                            target_company, best_officer, best_score, 'FUZZY'
-                        ))
-                        fuzzy_count += 1
-                    else:
-                        chunk_matches.append({
-                            'Company': target_company,
-                            'Officer': '',
-                            'Address': '',
-                            'City': '',
-                            'State': '',
-                            'Zip': '',
-                            'Match_Type': 'NO_MATCH',
-                            'Match_Score': 0
-                        })
-                        no_match_count += 1
-            
-            print(f"  Chunk results: {exact_count} exact, {fuzzy_count} fuzzy, {no_match_count} no match")
+            chunk_args.append((companies_df.iloc[start_idx:end_idx], chunk_id))
+
+        n_workers = min(cpu_count(), num_chunks) if num_chunks else 1
+        print(f"\nStep 3: Matching {len(companies_df)} companies in {num_chunks} chunks of {self.chunk_size} using {n_workers} workers...")
+
+        if n_workers > 1:
+            with Pool(processes=n_workers, initializer=_init_worker, initargs=(self,)) as pool:
+                chunk_results = pool.map(_run_chunk_in_worker, chunk_args)
+        else:
+            chunk_results = [self.process_company_chunk(args) for args in chunk_args]
+
+        all_matches = []
+        for chunk_id, (chunk_matches, exact_count, fuzzy_count, no_match_count) in enumerate(chunk_results):
+            print(f"  Chunk {chunk_id + 1}/{num_chunks}: {exact_count} exact, {fuzzy_count} fuzzy, {no_match_count} no match")
             all_matches.extend(chunk_matches)
-            
-            # Clear memory
-            gc.collect()
-        
+
+        # Clear memory
+        gc.collect()
+
         # Create final dataframe
         results_df = pd.DataFrame(all_matches)
-        results_df = results_df.sort_values('Company')
         
         print("\n" + "="*60)
         print("MATCHING COMPLETE:")
@@ -297,9 +389,12 @@ class EfficientCompanyMatcher:
         
         print(f"\nSaving results to: {output_file}")
         
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+        # xlsxwriter in constant_memory mode streams rows to disk instead
+        # of keeping every cell object alive the way openpyxl does
+        with pd.ExcelWriter(output_file, engine='xlsxwriter',
+                            engine_kwargs={'options': {'constant_memory': True}}) as writer:
             # Main results
-            df.to_excel(writer, sheet_name='Matched_Officers', index=False)
+            _write_frame_rows(writer, df, 'Matched_Officers')
             
             # Summary statistics
             summary = {
@@ -321,7 +416,7 @@ class EfficientCompanyMatcher:
                 ]
             }
             
-            pd.DataFrame(summary).to_excel(writer, sheet_name='Summary', index=False)
+            _write_frame_rows(writer, pd.DataFrame(summary), 'Summary')
             
             # Format columns
             worksheet = writer.sheets['Matched_Officers']
@@ -331,10 +426,34 @@ class EfficientCompanyMatcher:
             }
             
             for col, width in column_widths.items():
-                worksheet.column_dimensions[col].width = width
+                col_idx = ord(col) - ord('A')
+                worksheet.set_column(col_idx, col_idx, width)
         
         print(f"  ✓ Results saved successfully!")
 
+def load_company_list(company_file):
+    """Load the company workbook, keeping a parquet cache for fast reloads"""
+    excel_path = Path(company_file)
+    parquet_path = excel_path.with_suffix(excel_path.suffix + '.parquet')
+
+    # Reuse the cache only while it is newer than the workbook
+    if parquet_path.exists() and parquet_path.stat().st_mtime > excel_path.stat().st_mtime:
+        try:
+            return pd.read_parquet(parquet_path)
+        except Exception as e:
+            print(f"   Parquet cache unreadable ({e}), falling back to Excel...")
+
+    df = pd.read_excel(excel_path)
+
+    try:
+        df.to_parquet(parquet_path)
+        print(f"   Cached company list as {parquet_path.name} for faster reloads")
+    except Exception as e:
+        # pyarrow/fastparquet not installed - keep working from Excel
+        print(f"   Could not write parquet cache: {e}")
+
+    return df
+
 def main():
     """Main execution with efficient processing"""
     
@@ -361,18 +480,22 @@ def main():
     officer_file = officer_files[-1]  # Most recent
     print(f"   Loading: {officer_file}")
     
-    # Read in chunks for large files
-    officers_chunks = []
-    for chunk in pd.read_csv(officer_file, encoding='utf-8-sig', chunksize=10000):
-        officers_chunks.append(chunk)
-    
-    officers_df = pd.concat(officers_chunks, ignore_index=True)
+    # Multithreaded Arrow CSV reader when available; otherwise a single
+    # pandas pass (the old chunked read + concat doubled peak memory)
+    try:
+        import pyarrow.csv as pacsv
+        table = pacsv.read_csv(
+            str(officer_file),
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=64 << 20)
+        )
+        officers_df = table.to_pandas()
+        # The files are written with a utf-8-sig BOM
+        officers_df.columns = [c.lstrip('﻿') for c in officers_df.columns]
+    except ImportError:
+        officers_df = pd.read_csv(officer_file, encoding='utf-8-sig')
+
     print(f"   ✓ Loaded {len(officers_df):,} officer records")
     
-    # Clear memory
-    del officers_chunks
-    gc.collect()
-    
     # Load company list
     print("\n2. Loading company list...")
     company_file = 'Corps 10-2-25.xlsx'
@@ -381,7 +504,7 @@ def main():
         print(f"ERROR: '{company_file}' not found!")
         return
     
-    companies_df = pd.read_excel(company_file)
+    companies_df = load_company_list(company_file)
     print(f"   ✓ Loaded {len(companies_df):,} companies")
     
     # Perform matching
@@ -1,205 +1,238 @@
 import pandas as pd
 import numpy as np
-from rapidfuzz import fuzz, process
+try:
+    from rapidfuzz import process
+    from rapidfuzz.distance import Indel
+except ImportError:
+    raise SystemExit("rapidfuzz is required: pip install rapidfuzz")
 import re
+import string
+import sys
 from datetime import datetime
+from functools import lru_cache
 import warnings
 from collections import defaultdict
-from multiprocessing import Pool, cpu_count
+from multiprocessing import cpu_count
 import gc
 warnings.filterwarnings('ignore')
 
+# Compiled once at import: re caches patterns, but the cache lookup and
+# flag parsing still run on every re.sub call
+_CLEAN_RE = re.compile(r'[^\w\s\.&]')
+_WS_RE = re.compile(r'\s+')
+
+# ASCII fast path for the scalar cleaner: one C-level translate pass
+# instead of the regex engine. Mirrors _CLEAN_RE's allowlist and folds
+# lowercase to uppercase in the same pass, so upper() never runs on
+# ASCII input
+_KEEP_CHARS = set(string.ascii_uppercase + string.digits + ' .&_')
+_CLEAN_TABLE = str.maketrans({
+    c: (c.upper() if c in string.ascii_lowercase else ' ')
+    for c in map(chr, range(128)) if c not in _KEEP_CHARS
+})
+
+@lru_cache(maxsize=65536)
+def _clean_name_scalar(name):
+    """Cached core of clean_company_name
+
+    Company names repeat heavily across officer rolls, so most scalar
+    calls after warm-up are pure dict hits.
+    """
+    name = name.strip()
+    # Keep business characters but normalize; the translate table
+    # uppercases as it cleans, so only non-ASCII input pays for upper()
+    if name.isascii():
+        name = name.translate(_CLEAN_TABLE)
+    else:
+        name = _CLEAN_RE.sub(' ', name.upper())
+    # split/join collapses whitespace runs and trims in one C pass
+    return ' '.join(name.split())
+
 class FastDocumentMatcher:
     """Ultra-fast document number matching with intelligent optimization"""
     
     def __init__(self, match_threshold=80):
         self.match_threshold = match_threshold
         self.exact_match_index = {}
-        self.prefix_index = defaultdict(list)
+        self.prefix_index = defaultdict(dict)
         self.token_index = defaultdict(list)
+        self.first_char_index = defaultdict(list)
         
     def clean_company_name(self, name):
-        """Fast company name standardization"""
-        if pd.isna(name) or not name:
+        """Fast company name standardization (scalar fallback - bulk
+        callers go through clean_company_name_series)"""
+        if name is None or not name:
             return ""
-        
-        # Single pass cleaning
-        name = str(name).upper().strip()
-        # Keep business characters but normalize
-        name = re.sub(r'[^\w\s\.&]', ' ', name)
-        name = ' '.join(name.split())
-        
-        return name
+        return _clean_name_scalar(str(name))
+
+    def clean_company_name_series(self, series):
+        """Vectorized clean_company_name for a whole column
+
+        Officer rolls repeat the same company names heavily, so the regex
+        pipeline only runs over the unique values; a C-level map then
+        broadcasts the cleaned form back across the full column.
+        """
+        s = series.fillna('').astype(str)
+        uniques = pd.Series(s.unique())
+        cleaned = uniques.str.upper().str.strip()
+        cleaned = cleaned.str.replace(_CLEAN_RE, ' ', regex=True)
+        cleaned = cleaned.str.replace(_WS_RE, ' ', regex=True).str.strip()
+        return s.map(pd.Series(cleaned.to_numpy(), index=uniques.to_numpy()))
     
     def build_indexes(self, officers_df):
         """Build multiple indexes for fast matching"""
         print("Building search indexes...")
         
-        for idx, row in officers_df.iterrows():
-            clean_name = row['clean_name']
-            doc_number = row['doc_number']
-            
+        # Structure-of-arrays: names and docs live in two parallel arrays
+        # and every bucket stores small integer row ids instead of
+        # duplicated (name, doc) tuples
+        self.names = officers_df['clean_name'].to_numpy()
+        self.docs = officers_df['doc_number'].to_numpy()
+        
+        for idx, clean_name in enumerate(self.names):
             if not clean_name:
                 continue
             
+            # First occurrence wins - this doubles as the dedup pass that
+            # used to be a separate drop_duplicates over the whole frame
+            if clean_name in self.exact_match_index:
+                continue
+
+            # Interned keys let dict probes short-circuit on pointer
+            # identity and collapse duplicates across the index structures
+            clean_name = sys.intern(clean_name)
+
             # Exact match index
-            self.exact_match_index[clean_name] = doc_number
+            self.exact_match_index[clean_name] = self.docs[idx]
             
-            # Prefix index (first 3-5 characters)
+            # First-letter bucket, used only as the last-resort fallback
+            self.first_char_index[clean_name[0]].append(idx)
+            
+            # Two-level prefix trie: prefix3 -> prefix5 -> row ids (names
+            # shorter than 5 chars sit under ''). Each entry is stored
+            # once, instead of appearing in both a 3- and a 5-char bucket
             if len(clean_name) >= 3:
-                prefix3 = clean_name[:3]
-                self.prefix_index[prefix3].append((clean_name, doc_number))
-                
-                if len(clean_name) >= 5:
-                    prefix5 = clean_name[:5]
-                    self.prefix_index[prefix5].append((clean_name, doc_number))
+                prefix5 = clean_name[:5] if len(clean_name) >= 5 else ''
+                subtree = self.prefix_index[clean_name[:3]]
+                subtree.setdefault(prefix5, []).append(idx)
             
-            # Token index (first meaningful word)
-            tokens = clean_name.split()
-            if tokens:
-                first_token = tokens[0]
-                if len(first_token) >= 3:  # Skip very short tokens
-                    self.token_index[first_token].append((clean_name, doc_number))
+            # Token index over every meaningful word, so reordered names
+            # ("SUNSHINE HOLDINGS" vs "HOLDINGS SUNSHINE") still share a
+            # bucket. For whole-token queries a dict probe per token is
+            # the same O(|query|) an Aho-Corasick automaton would give
+            # Tokens are stored as bytes: same dict mechanics, but the
+            # keys carry no str header overhead and hash fewer bytes
+            for token in set(clean_name.split()):
+                if len(token) >= 3:  # Skip very short tokens
+                    self.token_index[token.encode()].append(idx)
+        
+        # Tokens carried by a large share of names (LLC, INC, GROUP...)
+        # produce huge buckets that never narrow anything - drop them
+        max_bucket = max(1, int(len(self.exact_match_index) * 0.05))
+        stop_tokens = [t for t, rows in self.token_index.items() if len(rows) > max_bucket]
+        for token in stop_tokens:
+            del self.token_index[token]
         
         print(f"  [INDEXED] {len(self.exact_match_index):,} exact matches")
         print(f"  [INDEXED] {len(self.prefix_index):,} prefixes")
-        print(f"  [INDEXED] {len(self.token_index):,} tokens")
+        print(f"  [INDEXED] {len(self.token_index):,} tokens ({len(stop_tokens)} too common, dropped)")
     
     def find_candidates(self, company_name):
-        """Find candidate matches using indexes - much faster than checking all"""
+        """Find candidate row ids using indexes - much faster than checking all"""
         candidates = set()
         
-        # Check prefix matches
+        # Walk the prefix trie: everything under the 3-char node shares
+        # the query's prefix (the old 5-char bucket was a subset of this)
         if len(company_name) >= 3:
-            prefix3 = company_name[:3]
-            if prefix3 in self.prefix_index:
-                candidates.update(self.prefix_index[prefix3])
-            
-            if len(company_name) >= 5:
-                prefix5 = company_name[:5]
-                if prefix5 in self.prefix_index:
-                    candidates.update(self.prefix_index[prefix5])
-        
-        # Check token matches
-        tokens = company_name.split()
-        if tokens:
-            first_token = tokens[0]
-            if first_token in self.token_index:
-                candidates.update(self.token_index[first_token])
-        
-        # If no candidates found, check similar prefixes
-        if not candidates and len(company_name) >= 3:
-            prefix = company_name[:3]
-            # Check prefixes that are one character different
-            for key in self.prefix_index:
-                if len(key) >= 3 and key[:2] == prefix[:2]:
-                    candidates.update(self.prefix_index[key][:50])  # Limit to top 50
+            subtree = self.prefix_index.get(company_name[:3])
+            if subtree:
+                for bucket in subtree.values():
+                    candidates.update(bucket)
+        
+        # Check token matches (any shared rare token qualifies)
+        for token in company_name.split():
+            bucket = self.token_index.get(token.encode())
+            if bucket:
+                candidates.update(bucket)
+        
+        # If no candidates found, fall back to the first-letter bucket -
+        # an O(1) lookup instead of the old scan over every prefix key
+        if not candidates and company_name:
+            candidates.update(self.first_char_index.get(company_name[0], [])[:200])
         
         return list(candidates)
     
-    def fast_match_single(self, company_data):
-        """Fast matching for a single company"""
-        company_name = company_data['clean_name']
-        original_name = company_data['original_name']
-        
-        if not company_name:
-            return {
-                'original_company': original_name,
-                'clean_company': company_name,
-                'matched_name': "",
-                'document_number': "",
-                'similarity_score': 0,
-                'match_quality': 'No Match',
-                'match_method': 'None'
-            }
-        
-        # Step 1: Check exact match (instant)
-        if company_name in self.exact_match_index:
-            return {
-                'original_company': original_name,
-                'clean_company': company_name,
-                'matched_name': company_name,
-                'document_number': self.exact_match_index[company_name],
-                'similarity_score': 100,
-                'match_quality': 'Exact',
-                'match_method': 'Exact'
-            }
-        
-        # Step 2: Find candidates using indexes (fast)
-        candidates = self.find_candidates(company_name)
-        
-        if not candidates:
-            # No candidates found
-            return {
-                'original_company': original_name,
-                'clean_company': company_name,
-                'matched_name': "",
-                'document_number': "",
-                'similarity_score': 0,
-                'match_quality': 'No Match',
-                'match_method': 'No Candidates'
-            }
-        
-        # Step 3: Score only candidates (much faster than all records)
-        best_match = None
-        best_score = 0
-        
-        # Use rapidfuzz for faster fuzzy matching
-        candidate_names = [c[0] for c in candidates]
-        candidate_docs = {c[0]: c[1] for c in candidates}
-        
-        # Get best match from candidates
-        result = process.extractOne(
-            company_name,
-            candidate_names,
-            scorer=fuzz.ratio,
-            score_cutoff=self.match_threshold
-        )
-        
-        if result:
-            matched_name, score, _ = result
-            return {
-                'original_company': original_name,
-                'clean_company': company_name,
-                'matched_name': matched_name,
-                'document_number': candidate_docs[matched_name],
-                'similarity_score': score,
-                'match_quality': self.get_match_quality(score),
-                'match_method': 'Fuzzy'
-            }
-        
-        # No good match found
-        return {
-            'original_company': original_name,
-            'clean_company': company_name,
-            'matched_name': "",
-            'document_number': "",
-            'similarity_score': 0,
-            'match_quality': 'No Match',
-            'match_method': 'Below Threshold'
-        }
-    
-    def get_match_quality(self, score):
-        """Determine match quality"""
-        if score == 100:
-            return 'Exact'
-        elif score >= 95:
-            return 'Excellent'
-        elif score >= 85:
-            return 'Very Good'
-        elif score >= 75:
-            return 'Good'
-        else:
-            return 'Fair'
-    
-    def match_batch(self, batch_data):
-        """Process a batch of companies"""
-        results = []
-        for company_data in batch_data:
-            result = self.fast_match_single(company_data)
-            results.append(result)
+    def match_fuzzy_bucketed(self, fuzzy_names):
+        """Batched fuzzy scoring for companies that missed the exact index
+
+        Takes unique clean names, grouped by their 3-char prefix bucket;
+        each bucket goes through one process.cdist call, letting rapidfuzz
+        batch the comparisons in C instead of paying a Python extractOne
+        call per company. Returns {clean_name: (matched_name, doc_number,
+        score)} with None for names that scored below the threshold;
+        names whose candidate probe came up empty are omitted entirely.
+        """
+        results = {}
+        # Length-sorted on both sides: consecutive cdist rows/columns then
+        # hit the same length-specialized rapidfuzz kernel instead of
+        # bouncing between specializations
+        buckets = defaultdict(list)
+        for name in sorted(fuzzy_names, key=len):
+            buckets[name[:3]].append(name)
+
+        for items in buckets.values():
+            # Union of every query's candidates, deduplicated by name
+            choices = {}
+            for name in items:
+                for cand_idx in self.find_candidates(name):
+                    choices.setdefault(self.names[cand_idx], self.docs[cand_idx])
+
+            if not choices:
+                # Left out of results so the caller can label these
+                # 'No Candidates' rather than 'Below Threshold'
+                continue
+
+            choice_names = list(choices)
+            queries = items
+
+            # Length pruning: indel distance is lower-bounded by length
+            # difference, so a choice can only reach the threshold t when
+            # q*t/(2-t) <= len(choice) <= q*(2-t)/t for some query length
+            # q in the bucket. Drop everything outside that band up front
+            t = self.match_threshold / 100.0
+            qlens = [len(q) for q in queries]
+            lo = min(qlens) * t / (2.0 - t)
+            hi = max(qlens) * (2.0 - t) / t
+            lens = np.fromiter((len(c) for c in choice_names), dtype=np.int64)
+            keep = (lens >= lo) & (lens <= hi)
+            if not keep.all():
+                choice_names = [c for c, k in zip(choice_names, keep) if k]
+            if not choice_names:
+                for name in items:
+                    results[name] = None
+                continue
+            choice_names.sort(key=len)
+            # Indel.normalized_similarity is what fuzz.ratio wraps; called
+            # directly with a cutoff, rapidfuzz applies its length-difference
+            # and band pruning and skips hopeless comparisons outright
+            scores = process.cdist(
+                queries, choice_names,
+                scorer=Indel.normalized_similarity,
+                score_cutoff=self.match_threshold / 100.0,
+                dtype=np.float32,
+                workers=-1
+            )
+            best = scores.argmax(axis=1)
+            for row, name in enumerate(items):
+                score = int(round(float(scores[row, best[row]]) * 100))
+                if score >= self.match_threshold:
+                    matched_name = choice_names[best[row]]
+                    results[name] = (matched_name, choices[matched_name], score)
+                else:
+                    results[name] = None
+
         return results
-    
+
     def match_companies_parallel(self, companies_df, officers_df, n_workers=None):
         """Parallel processing for maximum speed"""
         
@@ -211,37 +244,104 @@ class FastDocumentMatcher:
         print("\nPhase 1: Building indexes...")
         self.build_indexes(officers_df)
         
-        # Prepare company data
+        # Phase 2: column arrays straight out of the frame - results are
+        # preallocated as typed arrays up front, so no per-row dicts are
+        # built and pd.DataFrame() at the end does no inference work
         print("\nPhase 2: Preparing company data...")
-        company_data = []
-        for _, row in companies_df.iterrows():
-            company_data.append({
-                'original_name': row.get('Company', ''),
-                'clean_name': row['clean_name']
-            })
+        originals = companies_df['Company'].fillna('').to_numpy()
+        cleans = companies_df['clean_name'].fillna('').to_numpy()
+        n = len(cleans)
         
-        print(f"  [PREPARED] {len(company_data):,} companies for matching")
+        matched_names = np.full(n, '', dtype=object)
+        doc_numbers = np.full(n, '', dtype=object)
+        scores_col = np.zeros(n, dtype=np.uint8)
+        methods = np.full(n, 'None', dtype=object)
         
-        # Process in batches
+        print(f"  [PREPARED] {n:,} companies for matching")
+        
+        # Phase 3: exact matches via the index, the rest through the
+        # batched fuzzy path
         print("\nPhase 3: Matching companies...")
         
-        # Single-threaded processing (often faster for this type of work)
-        results = []
-        batch_size = 100
-        total_batches = (len(company_data) + batch_size - 1) // batch_size
+        # Exact phase as one C-level hash join: every clean name is
+        # mapped through the exact index at once, instead of a Python
+        # dict probe inside the row loop
+        exact_docs = companies_df['clean_name'].map(self.exact_match_index).to_numpy()
+        exact_mask = pd.notna(exact_docs)
         
-        for i in range(0, len(company_data), batch_size):
-            batch = company_data[i:i + batch_size]
-            batch_results = self.match_batch(batch)
-            results.extend(batch_results)
-            
-            # Progress update
-            current_batch = (i // batch_size) + 1
-            if current_batch % 10 == 0 or current_batch == total_batches:
-                progress = (i + len(batch)) / len(company_data) * 100
-                print(f"  Progress: {progress:.1f}% ({i + len(batch):,}/{len(company_data):,} companies)")
+        # Duplicate clean names are scored once and the result broadcast
+        # to every row carrying that name
+        fuzzy_rows = defaultdict(list)
+        for i, clean_name in enumerate(cleans):
+            if not clean_name:
+                continue
+            if exact_mask[i]:
+                matched_names[i] = clean_name
+                doc_numbers[i] = exact_docs[i]
+                scores_col[i] = 100
+                methods[i] = 'Exact'
+            else:
+                fuzzy_rows[clean_name].append(i)
+                methods[i] = 'Below Threshold'
+        
+        n_fuzzy = sum(len(rows) for rows in fuzzy_rows.values())
+        print(f"  Exact phase: {n - n_fuzzy:,} resolved, "
+              f"{n_fuzzy:,} rows ({len(fuzzy_rows):,} unique names) going to fuzzy matching")
+        
+        fuzzy_results = self.match_fuzzy_bucketed(list(fuzzy_rows))
+        for clean_name, rows in fuzzy_rows.items():
+            match = fuzzy_results.get(clean_name)
+            if match:
+                matched_name, doc_number, score = match
+                for i in rows:
+                    matched_names[i] = matched_name
+                    doc_numbers[i] = doc_number
+                    scores_col[i] = score
+                    methods[i] = 'Fuzzy'
+            elif clean_name not in fuzzy_results:
+                # Names the index produced no candidates for at all,
+                # as opposed to candidates that scored under the cutoff
+                for i in rows:
+                    methods[i] = 'No Candidates'
+        
+        results_df = pd.DataFrame({
+            'original_company': originals,
+            'clean_company': cleans,
+            'matched_name': matched_names,
+            'document_number': doc_numbers,
+            'similarity_score': scores_col,
+            'match_method': methods
+        })
+        
+        # Quality labels in one bucketize pass instead of a per-row
+        # if/elif chain; rows that never matched stay 'No Match'
+        score_bins = np.digitize(results_df['similarity_score'].to_numpy(), [75, 85, 95, 100])
+        quality_labels = np.array(['Fair', 'Good', 'Very Good', 'Excellent', 'Exact'])
+        matched = results_df['document_number'].to_numpy() != ''
+        results_df.insert(5, 'match_quality',
+                          np.where(matched, quality_labels[score_bins], 'No Match'))
         
-        return pd.DataFrame(results)
+        # Compact dtypes: quality/method repeat a handful of labels
+        # (similarity_score is already uint8 from its preallocated array)
+        results_df['match_quality'] = results_df['match_quality'].astype('category')
+        results_df['match_method'] = results_df['match_method'].astype('category')
+        
+        return results_df
+
+def _write_frame_rows(writer, frame, sheet_name):
+    """Stream a DataFrame to a worksheet one row at a time, top-down
+
+    Required under constant_memory: the workbook flushes each row when a
+    later one is started and ignores writes to flushed rows, so
+    to_excel's column-by-column cell order would lose everything but
+    the first column.
+    """
+    worksheet = writer.book.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, [str(col) for col in frame.columns])
+    for row_num, row in enumerate(frame.itertuples(index=False), start=1):
+        worksheet.write_row(row_num, 0,
+                            ['' if pd.isna(value) else value for value in row])
+    return worksheet
 
 def load_data_efficiently(csv_file, excel_file):
     """Load data files efficiently"""
@@ -274,8 +374,18 @@ def load_data_efficiently(csv_file, excel_file):
             doc_col = 'doc_number'
             company_col = 'company_name'
         
-        # Load data
-        officers_df = pd.read_csv(csv_file, usecols=[doc_col, company_col])
+        # Load data - pyarrow's CSV reader tokenizes in parallel and is
+        # several times faster than pandas on a file this size
+        try:
+            import pyarrow.csv as pacsv
+            table = pacsv.read_csv(
+                csv_file,
+                read_options=pacsv.ReadOptions(use_threads=True),
+                convert_options=pacsv.ConvertOptions(include_columns=[doc_col, company_col])
+            )
+            officers_df = table.to_pandas()
+        except ImportError:
+            officers_df = pd.read_csv(csv_file, usecols=[doc_col, company_col])
         officers_df.columns = ['doc_number', 'company_name']
         
     except Exception as e:
@@ -327,13 +437,8 @@ def main():
     print("\nCleaning company names...")
     matcher = FastDocumentMatcher(match_threshold=80)
     
-    officers_df['clean_name'] = officers_df['company_name'].apply(matcher.clean_company_name)
-    companies_df['clean_name'] = companies_df['Company'].apply(matcher.clean_company_name)
-    
-    # Remove duplicates from officers to speed up matching
-    print("Removing duplicate entries...")
-    officers_df = officers_df.drop_duplicates(subset=['clean_name', 'doc_number'])
-    print(f"  [REDUCED] {len(officers_df):,} unique officer records")
+    officers_df['clean_name'] = matcher.clean_company_name_series(officers_df['company_name'])
+    companies_df['clean_name'] = matcher.clean_company_name_series(companies_df['Company'])
     
     # Run matching
     results_df = matcher.match_companies_parallel(companies_df, officers_df)
@@ -349,9 +454,12 @@ def main():
     output_file = f'fast_document_matches_{timestamp}.xlsx'
     
     print("\nSaving results...")
-    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+    # constant_memory streams rows to disk instead of building the whole
+    # workbook in RAM the way openpyxl does
+    with pd.ExcelWriter(output_file, engine='xlsxwriter',
+                        engine_kwargs={'options': {'constant_memory': True}}) as writer:
         # Main results
-        results_df.to_excel(writer, sheet_name='Matches', index=False)
+        _write_frame_rows(writer, results_df, 'Matches')
         
         # Summary statistics
         summary = pd.DataFrame({
@@ -372,22 +480,15 @@ def main():
                 str(datetime.now() - start_time).split('.')[0]
             ]
         })
-        summary.to_excel(writer, sheet_name='Summary', index=False)
+        _write_frame_rows(writer, summary, 'Summary')
         
-        # Format worksheets
-        for sheet_name in writer.sheets:
+        # Column widths from the frames themselves (vectorized), instead
+        # of re-reading every written cell
+        for sheet_name, frame in (('Matches', results_df), ('Summary', summary)):
             worksheet = writer.sheets[sheet_name]
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
+            for i, col in enumerate(frame.columns):
+                width = max(int(frame[col].astype(str).str.len().max()), len(str(col)))
+                worksheet.set_column(i, i, min(width + 2, 50))
     
     # Print summary
     print("\n" + "="*80)
@@ -415,13 +516,4 @@ def main():
     return results_df
 
 if __name__ == "__main__":
-    # Try to install rapidfuzz if not available
-    try:
-        from rapidfuzz import fuzz, process
-    except ImportError:
-        print("Installing rapidfuzz for better performance...")
-        import subprocess
-        subprocess.check_call(['pip', 'install', 'rapidfuzz'])
-        from rapidfuzz import fuzz, process
-    
     results = main()
\ No newline at end of file
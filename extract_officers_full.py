@@ -1,8 +1,31 @@
 import pandas as pd
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+# Patterns compiled once at import - the per-call re cache lookup adds
+# up over millions of lines
+# Pattern: ROLE + STATUS_CHAR + LASTNAME + FIRSTNAME + MIDDLE_INITIAL
+OFFICER_RE = re.compile(r"(AMBR|MGRM|MGR|CEO|CFO|COO|PRES|VP|SEC|DIR|AP|P)\s*([PCMD])([A-Z][A-Z\-' ]{8,20})\s+([A-Z][A-Z\-' ]{8,20})\s+([A-Z]?)\s+")
+# One pattern covers all three zip layouts the old fallback chain
+# probed separately: CITY FL33304, CITY, FL33304 and CITY FL 33304
+CSZ_ANY_RE = re.compile(r'([A-Z\s\-\.]+?)(?:\s*,\s*|\s+)([A-Z]{2})\s*(\d{5})')
+CS_RE = re.compile(r'([A-Z\s\-\.]+?)\s+([A-Z]{2})')
+WS_RE = re.compile(r'\s+')
+# Cheap prescan: just the role literals and the status char, no bounded
+# quantifiers - used to reject lines before running the full pattern
+OFFICER_PREFILTER_RE = re.compile(r'(?:AMBR|MGRM|MGR|CEO|CFO|COO|PRES|VP|SEC|DIR|AP|P)\s*[PCMD]')
+# Trim variants: cut the city/state(/zip) hit and everything after it
+# off the street portion of address2
+CSZ_TRIM_RE = re.compile(CSZ_ANY_RE.pattern + r'.*$')
+CS_TRIM_RE = re.compile(CS_RE.pattern + r'.*$')
+
+# Fixed-width layout of the cordata files (see analyze_file_structure)
+COLSPECS = [(0, 12), (12, 165), (165, 315), (315, 465), (600, 900)]
+COLNAMES = ['doc_number', 'company_name', 'address1', 'address2', 'officer_section']
+
 def extract_officer_from_line(line):
     """Extract officer and address data from a single line"""
     
@@ -12,10 +35,7 @@ def extract_officer_from_line(line):
     
     search_section = line[600:900]
     
-    # Pattern: ROLE + STATUS_CHAR + LASTNAME + FIRSTNAME + MIDDLE_INITIAL
-    officer_pattern = r'(AMBR|MGRM|MGR|CEO|CFO|COO|PRES|VP|SEC|DIR|AP|P)\s*([PCMD])([A-Z][A-Z\-\' ]{8,20})\s+([A-Z][A-Z\-\' ]{8,20})\s+([A-Z]?)\s+'
-    
-    match = re.search(officer_pattern, search_section)
+    match = OFFICER_RE.search(search_section)
     
     if not match:
         return None
@@ -28,8 +48,10 @@ def extract_officer_from_line(line):
     
     # Extract company info
     # Company name starts at position 12, not 15 (was missing first 3 letters)
-    company_name = line[12:165].strip() if len(line) > 165 else line[12:].strip()
-    doc_num = line[0:12].strip() if len(line) > 12 else line[0:].strip()
+    # Fields start on column boundaries, so only trailing padding needs
+    # trimming - rstrip skips the scan of the leading side
+    company_name = line[12:165].rstrip() if len(line) > 165 else line[12:].rstrip()
+    doc_num = line[0:12].rstrip() if len(line) > 12 else line[0:].rstrip()
     
     # Extract address information with corrected parsing
     # Based on actual cordata file structure analysis:
@@ -46,20 +68,20 @@ def extract_officer_from_line(line):
     try:
         # Primary address (first part of street address)
         if len(line) > 315:
-            address1 = line[165:315].strip()
+            address1 = line[165:315].rstrip()
         
         # Secondary address line - THIS CONTAINS CITY, STATE, ZIP
         if len(line) > 465:
-            address2_raw = line[315:465].strip()
+            address2_raw = line[315:465].rstrip()
             
             # Clean up the raw data - remove extra spaces and normalize
-            address2_clean = re.sub(r'\s+', ' ', address2_raw).strip()
+            # (split/join is a C builtin, ~2x faster than the regex here)
+            address2_clean = ' '.join(address2_raw.split())
             
-            # Look for city, state, zip pattern in this section
-            # Pattern: CITY FL33304 (no space between state and zip)
+            # Look for city, state, zip in this section - one search
+            # instead of three sequential pattern probes
             # Example: "FT. LAUDERDALE FL33304"
-            csz_pattern = r'([A-Z\s\-\.]+?)\s+([A-Z]{2})(\d{5})'
-            csz_match = re.search(csz_pattern, address2_clean)
+            csz_match = CSZ_ANY_RE.search(address2_clean)
             
             if csz_match:
                 city = csz_match.group(1).strip()
@@ -68,34 +90,15 @@ def extract_officer_from_line(line):
                 # Set address2 to just the street part (before city)
                 address2 = address2_clean[:csz_match.start()].strip()
             else:
-                # Try pattern with comma: CITY, FL33304
-                csz_pattern_comma = r'([A-Z\s\-\.]+?),\s*([A-Z]{2})(\d{5})'
-                csz_match_comma = re.search(csz_pattern_comma, address2_clean)
-                if csz_match_comma:
-                    city = csz_match_comma.group(1).strip()
-                    state = csz_match_comma.group(2).strip()
-                    zip_code = csz_match_comma.group(3).strip()
-                    address2 = address2_clean[:csz_match_comma.start()].strip()
+                # Try to extract just city and state without zip
+                cs_match = CS_RE.search(address2_clean)
+                if cs_match:
+                    city = cs_match.group(1).strip()
+                    state = cs_match.group(2).strip()
+                    address2 = address2_clean[:cs_match.start()].strip()
                 else:
-                    # Try pattern with space: CITY FL ZIPCODE
-                    csz_pattern_space = r'([A-Z\s\-\.]+?)\s+([A-Z]{2})\s+(\d{5})'
-                    csz_match_space = re.search(csz_pattern_space, address2_clean)
-                    if csz_match_space:
-                        city = csz_match_space.group(1).strip()
-                        state = csz_match_space.group(2).strip()
-                        zip_code = csz_match_space.group(3).strip()
-                        address2 = address2_clean[:csz_match_space.start()].strip()
-                    else:
-                        # Try to extract just city and state without zip
-                        city_state_pattern = r'([A-Z\s\-\.]+?)\s+([A-Z]{2})'
-                        cs_match = re.search(city_state_pattern, address2_clean)
-                        if cs_match:
-                            city = cs_match.group(1).strip()
-                            state = cs_match.group(2).strip()
-                            address2 = address2_clean[:cs_match.start()].strip()
-                        else:
-                            # Fallback: use the cleaned string as address2
-                            address2 = address2_clean
+                    # Fallback: use the cleaned string as address2
+                    address2 = address2_clean
     
     except Exception as e:
         # If parsing fails, continue with what we have
@@ -125,43 +128,132 @@ def extract_officer_from_line(line):
         'extraction_timestamp': extraction_timestamp
     }
 
-def process_file_in_chunks(file_path, chunk_size=50000):
+def extract_officers_from_chunk(chunk_df, extraction_timestamp):
+    """Vectorized version of extract_officer_from_line for one read_fwf chunk
+
+    Every step - the officer pattern, the address cleanup and the
+    city/state/zip split - runs as a whole-column pandas operation, so
+    there is no Python call per line. Returns a DataFrame of extracted
+    officers, or None when the chunk has no matches.
+    """
+    section = chunk_df['officer_section'].fillna('')
+
+    # Same validity gate as extract_officer_from_line: a line must reach
+    # the full 900-char layout. The reader keeps fields unstripped (see
+    # the delimiter note in process_file_in_chunks), so the section width
+    # reflects the raw line length; 299 rather than 300 because the
+    # scalar check counts the trailing newline in len(line)
+    full_width = section.str.len().ge(299)
+    # Early reject: most lines carry no officer, and the literal prescan
+    # is far cheaper than the full pattern with its {8,20} name groups
+    maybe = full_width & section.str.contains(OFFICER_PREFILTER_RE)
+    if not maybe.any():
+        return None
+    
+    officer = section[maybe].str.extract(OFFICER_RE)
+    keep = officer[0].notna()
+    if not keep.any():
+        return None
+    
+    officer = officer[keep]
+    rows = chunk_df[maybe][keep]
+    
+    role = officer[0]
+    status = officer[1]
+    last_name = officer[2].str.strip()
+    first_name = officer[3].str.strip()
+    middle = officer[4].fillna('').str.strip()
+    
+    address1 = rows['address1'].fillna('')
+    address2_clean = rows['address2'].fillna('').str.replace(WS_RE, ' ', regex=True).str.strip()
+    
+    # City/state/zip first, zipless city/state as the fallback
+    csz = address2_clean.str.extract(CSZ_ANY_RE)
+    cs = address2_clean.str.extract(CS_RE)
+    city = csz[0].fillna(cs[0]).fillna('').str.strip()
+    state = csz[1].fillna(cs[1]).fillna('')
+    zip_code = csz[2].fillna('')
+    
+    # Street part of address2 = everything before the first hit
+    address2 = address2_clean.copy()
+    has_csz = csz[0].notna()
+    address2[has_csz] = address2_clean[has_csz].str.replace(CSZ_TRIM_RE, '', regex=True)
+    has_cs = ~has_csz & cs[0].notna()
+    address2[has_cs] = address2_clean[has_cs].str.replace(CS_TRIM_RE, '', regex=True)
+    address2 = address2.str.strip()
+    
+    full_address = (address1 + ' ' + address2).str.replace(WS_RE, ' ', regex=True).str.strip()
+    city_state_zip = (city + ', ' + state + ', ' + zip_code) \
+        .str.replace(', , ', ', ', regex=False) \
+        .str.replace(r'^(, )+|(, )+$', '', regex=True)
+    full_name = (first_name + ' ' + middle + ' ' + last_name) \
+        .str.replace(WS_RE, ' ', regex=True).str.strip()
+    
+    # Fields arrive unstripped from the reader; rstrip matches the
+    # scalar path's handling of the trailing column padding
+    return pd.DataFrame({
+        'doc_number': rows['doc_number'].fillna('').str.rstrip(),
+        'company_name': rows['company_name'].fillna('').str.rstrip(),
+        'officer_role': role,
+        'officer_last': last_name,
+        'officer_first': first_name,
+        'officer_middle': middle,
+        'officer_full_name': full_name,
+        'status': status,
+        'address': full_address,
+        'city_state_zip': city_state_zip,
+        'city': city,
+        'state': state,
+        'zip_code': zip_code,
+        'extraction_timestamp': extraction_timestamp,
+        'line_number': rows.index + 1
+    })
+
+def process_file_in_chunks(file_path, chunk_size=50000, extraction_timestamp=None):
     """Process a file in chunks to manage memory"""
     
+    # One timestamp per run (or per file when called standalone) - the
+    # old code formatted datetime.now() once per extracted officer
+    if extraction_timestamp is None:
+        extraction_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
     print(f"\nProcessing: {file_path.name}")
     print("-" * 60)
     
-    all_officers = []
+    frames = []
     total_lines = 0
+    total_officers = 0
     chunk_num = 0
     
-    with open(file_path, 'r', encoding='latin-1', errors='ignore') as f:
-        chunk = []
+    # delimiter is the filler character read_fwf strips from each field;
+    # NUL never occurs in the data, so fields keep their space padding and
+    # raw widths - the chunk extractor needs those to enforce the same
+    # 900-char validity gate as extract_officer_from_line
+    reader = pd.read_fwf(file_path, colspecs=COLSPECS, names=COLNAMES,
+                         dtype=str, header=None, encoding='latin-1',
+                         chunksize=chunk_size, memory_map=True,
+                         delimiter='\x00')
+    for chunk_df in reader:
+        chunk_num += 1
+        total_lines += len(chunk_df)
         
-        for line_num, line in enumerate(f, 1):
-            total_lines += 1
-            
-            officer_data = extract_officer_from_line(line)
-            
-            if officer_data:
-                officer_data['source_file'] = file_path.name
-                officer_data['line_number'] = line_num
-                chunk.append(officer_data)
-            
-            # Process chunk when it reaches chunk_size
-            if len(chunk) >= chunk_size:
-                chunk_num += 1
-                all_officers.extend(chunk)
-                print(f"  Chunk {chunk_num}: Processed {total_lines:,} lines, found {len(all_officers):,} officers")
-                chunk = []
+        officers = extract_officers_from_chunk(chunk_df, extraction_timestamp)
+        if officers is not None:
+            officers['source_file'] = file_path.name
+            frames.append(officers)
+            total_officers += len(officers)
         
-        # Process remaining items
-        if chunk:
-            all_officers.extend(chunk)
+        # With files running in parallel workers, a print per chunk
+        # serializes on the terminal lock - report every 10th chunk
+        if chunk_num % 10 == 0:
+            print(f"  Chunk {chunk_num}: Processed {total_lines:,} lines, found {total_officers:,} officers")
+    
+    result = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
     
-    print(f"  Complete: {len(all_officers):,} officers from {total_lines:,} lines ({len(all_officers)/total_lines*100:.1f}%)")
+    if total_lines:
+        print(f"  Complete: {total_officers:,} officers from {total_lines:,} lines ({total_officers/total_lines*100:.1f}%)")
     
-    return all_officers
+    return result
 
 def analyze_file_structure(file_path, num_lines=10):
     """Analyze the structure of the data file to help identify field positions"""
@@ -193,13 +285,49 @@ def analyze_file_structure(file_path, num_lines=10):
                     if content:
                         print(f"{name}: '{content[:50]}{'...' if len(content) > 50 else ''}'")
 
+def extract_one_file(args):
+    """Pool worker: extract a single file, sharding it to Parquet when
+    possible so only a path travels back over pickle"""
+    file_path, shard_dir, extraction_timestamp = args
+    officers = process_file_in_chunks(file_path, extraction_timestamp=extraction_timestamp)
+    if not len(officers):
+        return None
+    if shard_dir is not None:
+        shard = shard_dir / (file_path.stem + '.parquet')
+        officers.to_parquet(shard, index=False)
+        return shard
+    return officers
+
+def write_excel_sheet(frame, excel_file, sheet_name):
+    """Write one frame as a worksheet via xlsxwriter constant_memory,
+    sizing columns from the frame itself
+
+    Rows are written directly in row-major order: constant_memory
+    flushes each row as soon as a later one is started and drops writes
+    to flushed rows, so to_excel's column-by-column cell order would
+    keep only the first column.
+    """
+    with pd.ExcelWriter(excel_file, engine='xlsxwriter',
+                        engine_kwargs={'options': {'constant_memory': True}}) as writer:
+        worksheet = writer.book.add_worksheet(sheet_name)
+        for idx, col in enumerate(frame.columns):
+            max_length = int(frame[col].astype(str).str.len().max()) if len(frame) else 0
+            width = min(max(max_length, len(str(col))) + 2, 50)
+            worksheet.set_column(idx, idx, width)
+
+        worksheet.write_row(0, 0, [str(col) for col in frame.columns])
+        for row_num, row in enumerate(frame.itertuples(index=False), start=1):
+            worksheet.write_row(row_num, 0,
+                                ['' if pd.isna(value) else value for value in row])
+
 def main():
     """Main processing function"""
     
     print("="*80)
     print("FLORIDA CORPORATION OFFICER DATA EXTRACTION (ENHANCED)")
     print("="*80)
-    print(f"Start time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    run_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    print(f"Start time: {run_timestamp}")
     
     # Optional: Analyze file structure first (uncomment to use)
     # sample_files = list(Path('.').glob('cordata*.txt'))[:1]
@@ -207,7 +335,17 @@ def main():
     #     analyze_file_structure(sample_files[0], num_lines=5)
     #     input("\nPress Enter to continue with extraction...")
     
-    all_officers = []
+    all_frames = []
+    shard_paths = []
+    
+    # Parquet shards keep ingest memory bounded: each finished file goes
+    # to disk instead of piling up in RAM until the very end
+    try:
+        import pyarrow  # noqa: F401
+        shard_dir = Path(f"officer_shards_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        shard_dir.mkdir(exist_ok=True)
+    except ImportError:
+        shard_dir = None
     
     # Process ALL cordata files (corporations) - cordata0.txt through cordata9.txt
     print("\n[1/2] Processing ALL CORPORATION files (cordata0.txt - cordata9.txt)")
@@ -222,10 +360,6 @@ def main():
     for f in cordata_files:
         print(f"  • {f.name}")
     
-    for file_path in cordata_files:
-        officers = process_file_in_chunks(file_path)
-        all_officers.extend(officers)
-    
     # Process ALL npcordata files (non-profits) - npcordata0.txt through npcordata9.txt
     print("\n[2/2] Processing ALL NON-PROFIT files (npcordata0.txt - npcordata9.txt)")
     print("="*80)
@@ -239,16 +373,40 @@ def main():
     for f in npcordata_files:
         print(f"  • {f.name}")
     
-    for file_path in npcordata_files:
-        officers = process_file_in_chunks(file_path)
-        all_officers.extend(officers)
+    # Extraction is regex-bound and the files are independent, so fan
+    # them out across cores; each worker ships back a shard path, not
+    # megabytes of pickled rows
+    tasks = [(fp, shard_dir, run_timestamp) for fp in cordata_files + npcordata_files]
+    n_workers = min(os.cpu_count() or 1, len(tasks)) if tasks else 1
+    print(f"\nExtracting {len(tasks)} files with {n_workers} workers...")
+    
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            outputs = list(executor.map(extract_one_file, tasks))
+    else:
+        outputs = [extract_one_file(task) for task in tasks]
+    
+    for output in outputs:
+        if output is None:
+            continue
+        if shard_dir is not None:
+            shard_paths.append(output)
+        else:
+            all_frames.append(output)
     
     # Convert to DataFrame
     print("\n" + "="*80)
     print("CREATING NEW OFFICER SHEET")
     print("="*80)
     
-    df = pd.DataFrame(all_officers)
+    if shard_dir is not None:
+        df = pd.concat([pd.read_parquet(p) for p in shard_paths],
+                       ignore_index=True) if shard_paths else pd.DataFrame()
+        for p in shard_paths:
+            p.unlink()
+        shard_dir.rmdir()
+    else:
+        df = pd.concat(all_frames, ignore_index=True) if all_frames else pd.DataFrame()
     
     # Add batch processing timestamp
     batch_timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -256,34 +414,26 @@ def main():
     # Save to CSV with timestamp in filename
     csv_file = f'new_officer_sheet_{batch_timestamp}.csv'
     print(f"\nSaving CSV: {csv_file}")
-    df.to_csv(csv_file, index=False, encoding='utf-8-sig')
+    try:
+        # Arrow's CSV writer formats in parallel C++; write the BOM
+        # ourselves so Excel still detects UTF-8
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        with open(csv_file, 'wb') as f:
+            f.write(b'\xef\xbb\xbf')
+            pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), f)
+    except ImportError:
+        df.to_csv(csv_file, index=False, encoding='utf-8-sig')
     print(f"  [SAVED] {len(df):,} records")
     
     # Check if data is too large for Excel (max 1,048,576 rows)
     if len(df) > 1048576:
-        print(f"\nData too large for Excel (8,142,243 records > 1,048,576 max)")
+        print(f"\nData too large for Excel ({len(df):,} records > 1,048,576 max)")
         print("Creating sample Excel file with first 1,000,000 records...")
         
-        # Create sample Excel file with first 1M records
         excel_file = f'new_officer_sheet_sample_{batch_timestamp}.xlsx'
         sample_df = df.head(1000000)
-        
-        with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
-            sample_df.to_excel(writer, sheet_name='New Officer Sheet Sample', index=False)
-            
-            # Auto-adjust column widths
-            worksheet = writer.sheets['New Officer Sheet Sample']
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
+        write_excel_sheet(sample_df, excel_file, 'New Officer Sheet Sample')
         
         print(f"  [SAVED] Sample Excel: {len(sample_df):,} records")
         print(f"  [NOTE] Full data available in CSV: {csv_file}")
@@ -291,26 +441,15 @@ def main():
         # Save to Excel with "New Officer Sheet" as the sheet name
         excel_file = f'new_officer_sheet_{batch_timestamp}.xlsx'
         print(f"\nSaving Excel: {excel_file}")
-        
-        with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='New Officer Sheet', index=False)
-            
-            # Auto-adjust column widths
-            worksheet = writer.sheets['New Officer Sheet']
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-        
+        write_excel_sheet(df, excel_file, 'New Officer Sheet')
         print(f"  [SAVED] {len(df):,} records")
     
+    # Low-cardinality columns: one stored value per distinct label
+    # instead of one Python string per row (~8M rows)
+    if len(df):
+        for col in ('officer_role', 'status', 'state', 'source_file'):
+            df[col] = df[col].astype('category')
+    
     # Summary statistics
     print("\n" + "="*80)
     print("EXTRACTION SUMMARY")
@@ -333,8 +472,11 @@ def main():
         print("  No state data extracted")
     
     print(f"\nRecords with complete address data:")
-    complete_addresses = df[(df['address'].notna() & df['address'] != '') & 
-                           (df['city'].notna() & df['city'] != '')].shape[0]
+    # One boolean mask, summed - no filtered copy of the frame. The old
+    # expression also had `& df['address'] != ''` binding as
+    # `(mask & df['address']) != ''` due to operator precedence
+    complete_mask = (df['address'] != '') & (df['city'] != '')
+    complete_addresses = int(complete_mask.sum())
     print(f"  {complete_addresses:,} ({complete_addresses/len(df)*100:.1f}%)")
     
     print(f"\nSource files:")
@@ -352,7 +494,7 @@ def main():
     print(f"  • Document Numbers: {df['doc_number'].nunique():,} unique")
     print(f"  • Company Names: {df['company_name'].nunique():,} unique")
     print(f"  • Officers: {len(df):,} total records")
-    print(f"  • Complete Addresses: {len(df[(df['address'].notna() & df['address'] != '') & (df['city'].notna() & df['city'] != '')]):,}")
+    print(f"  • Complete Addresses: {complete_addresses:,}")
     print("\nReady for Document Number Matching!")
 
 if __name__ == "__main__":
@@ -4,6 +4,20 @@ from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+def _write_frame_rows(writer, frame, sheet_name):
+    """Write a frame to a worksheet in strict row order
+
+    constant_memory discards writes to rows it has already flushed;
+    to_excel fills sheets column-by-column and would lose every column
+    after the first, so the rows are streamed out here via write_row.
+    """
+    worksheet = writer.book.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, [str(col) for col in frame.columns])
+    for row_num, row in enumerate(frame.itertuples(index=False), start=1):
+        worksheet.write_row(row_num, 0,
+                            ['' if pd.isna(value) else value for value in row])
+    return worksheet
+
 def fill_corps_columns():
     """Fill empty columns in Corps 10-2-25.xlsx with matched document numbers"""
     
@@ -43,50 +57,41 @@ def fill_corps_columns():
         print(f"Error loading matching results: {e}")
         return
     
-    # Create a mapping from company name to document number
+    # Build the lookup as a frame: valid matches only, last occurrence
+    # per company (same winner as the old dict-overwrite pass)
     print("\nCreating company-to-document mapping...")
-    company_to_doc = {}
-    for _, row in matches_df.iterrows():
-        if pd.notna(row['document_number']) and row['document_number'] != '':
-            company_to_doc[row['original_company']] = {
-                'document_number': row['document_number'],
-                'matched_name': row['matched_name'],
-                'similarity_score': row['similarity_score'],
-                'match_quality': row['match_quality']
-            }
+    valid_matches = matches_df[matches_df['document_number'].notna() &
+                               (matches_df['document_number'] != '')].copy()
+    # Join on a normalized key so trailing spaces or case differences
+    # between the two files can't silently drop matches
+    valid_matches['_key'] = valid_matches['original_company'].astype(str).str.upper().str.strip()
+    valid_matches = valid_matches.drop_duplicates(subset='_key', keep='last')
     
-    print(f"  [MAPPED] {len(company_to_doc):,} companies with document numbers")
+    print(f"  [MAPPED] {len(valid_matches):,} companies with document numbers")
     
     # Check what columns exist in Corps file
     print(f"\nOriginal Corps file columns:")
     for i, col in enumerate(corps_df.columns):
         print(f"  {i+1:2d}. {col}")
     
-    # Add new columns for document numbers and matching info
+    # Fill the new columns with one hash join instead of walking both
+    # frames row by row
     print("\nAdding new columns to Corps file...")
+    corps_key = corps_df['Company'].astype(str).str.upper().str.strip()
+    merged = corps_df.assign(_key=corps_key).merge(
+        valid_matches[['_key', 'document_number', 'matched_name',
+                       'similarity_score', 'match_quality']],
+        on='_key', how='left'
+    )
     
-    # Initialize new columns
-    corps_df['Document_Number'] = ''
-    corps_df['Matched_Company_Name'] = ''
-    corps_df['Match_Similarity_Score'] = 0
-    corps_df['Match_Quality'] = ''
-    corps_df['Match_Status'] = 'No Match'
-    
-    # Fill in the data
     print("Filling in document numbers...")
-    matches_found = 0
-    
-    for idx, row in corps_df.iterrows():
-        company_name = row.get('Company', '')
-        
-        if company_name in company_to_doc:
-            match_data = company_to_doc[company_name]
-            corps_df.at[idx, 'Document_Number'] = match_data['document_number']
-            corps_df.at[idx, 'Matched_Company_Name'] = match_data['matched_name']
-            corps_df.at[idx, 'Match_Similarity_Score'] = match_data['similarity_score']
-            corps_df.at[idx, 'Match_Quality'] = match_data['match_quality']
-            corps_df.at[idx, 'Match_Status'] = 'Matched'
-            matches_found += 1
+    matched_mask = merged['document_number'].notna().to_numpy()
+    corps_df['Document_Number'] = merged['document_number'].fillna('').to_numpy()
+    corps_df['Matched_Company_Name'] = merged['matched_name'].fillna('').to_numpy()
+    corps_df['Match_Similarity_Score'] = merged['similarity_score'].fillna(0).to_numpy()
+    corps_df['Match_Quality'] = merged['match_quality'].fillna('').to_numpy()
+    corps_df['Match_Status'] = np.where(matched_mask, 'Matched', 'No Match')
+    matches_found = int(matched_mask.sum())
     
     print(f"  [FILLED] {matches_found:,} companies with document numbers")
     
@@ -114,9 +119,12 @@ def fill_corps_columns():
     
     print(f"\nSaving updated Corps file...")
     try:
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+        # constant_memory streams rows out instead of building the whole
+        # workbook in RAM the way openpyxl does
+        with pd.ExcelWriter(output_file, engine='xlsxwriter',
+                            engine_kwargs={'options': {'constant_memory': True}}) as writer:
             # Main data with filled columns
-            corps_df.to_excel(writer, sheet_name='Corps Data', index=False)
+            _write_frame_rows(writer, corps_df, 'Corps Data')
             
             # Summary statistics
             summary_data = {
@@ -141,26 +149,22 @@ def fill_corps_columns():
             }
             
             summary_df = pd.DataFrame(summary_data)
-            summary_df.to_excel(writer, sheet_name='Summary', index=False)
-            
+            _write_frame_rows(writer, summary_df, 'Summary')
+
             # Show sample of matched companies
             matched_sample = corps_df[corps_df['Match_Status'] == 'Matched'].head(20)
-            matched_sample.to_excel(writer, sheet_name='Sample Matches', index=False)
+            _write_frame_rows(writer, matched_sample, 'Sample Matches')
             
-            # Auto-adjust column widths
-            for sheet_name in writer.sheets:
+            # Auto-adjust column widths, measured vectorized from each
+            # frame instead of re-reading every written cell
+            for sheet_name, frame in (('Corps Data', corps_df),
+                                      ('Summary', summary_df),
+                                      ('Sample Matches', matched_sample)):
                 worksheet = writer.sheets[sheet_name]
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
+                for idx, col in enumerate(frame.columns):
+                    max_length = int(frame[col].astype(str).str.len().max()) if len(frame) else 0
+                    width = min(max(max_length, len(str(col))) + 2, 50)
+                    worksheet.set_column(idx, idx, width)
         
         print(f"  [SAVED] {output_file}")
         
@@ -1,44 +1,91 @@
 import pandas as pd
-import numpy as np
+import re
 from datetime import datetime
 from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
 import warnings
 warnings.filterwarnings('ignore')
 
+# Translation table mapping both newline variants to spaces in one
+# C-level pass instead of two str.replace scans per column
+_NL_TR = str.maketrans({'\n': ' ', '\r': ' '})
+_WS_RE = re.compile(r'\s+')
+
+def _read_excel_fast(filepath, sheet_name=None):
+    """Stream a worksheet into a DataFrame via openpyxl read-only mode
+
+    read_only=True avoids materializing the full workbook DOM (cell and
+    style objects for every cell), which is what makes pd.read_excel slow
+    on large sheets. Returns (df, sheet_names).
+    """
+    wb = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        if sheet_name is not None and sheet_name in wb.sheetnames:
+            ws = wb[sheet_name]
+        else:
+            ws = wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame(), wb.sheetnames
+        df = pd.DataFrame.from_records(rows, columns=list(header))
+        return df, wb.sheetnames
+    finally:
+        wb.close()
+
+def _column_widths(frame):
+    """Measure display widths from a DataFrame (first 100 rows, vectorized)
+
+    Same min/max limits as before, but computed in pandas before the
+    sheet is written instead of re-reading written cells via openpyxl.
+    """
+    head = frame.head(100)
+    widths = []
+    for col in frame.columns:
+        max_length = int(head[col].astype(str).str.len().max()) if len(head) else 0
+        widths.append(min(max(max(max_length, len(str(col))) + 2, 10), 50))
+    return widths
+
 class CorpsFormatter:
     """Apply consistent Corps formatting to files with all columns preserved"""
     
     def __init__(self):
         self.timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-        # Corps standard styling - matching your spreadsheet
-        self.light_blue_fill = PatternFill(start_color="D9E2F3", end_color="D9E2F3", fill_type="solid")
-        self.white_fill = PatternFill(start_color="FFFFFF", end_color="FFFFFF", fill_type="solid")
-        self.header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        self.header_font = Font(color="FFFFFF", bold=True, size=11, name='Calibri')
-        self.cell_font = Font(size=11, name='Calibri')
-        self.thin_border = Border(
-            left=Side(style='thin', color='B4C6E7'),
-            right=Side(style='thin', color='B4C6E7'),
-            top=Side(style='thin', color='B4C6E7'),
-            bottom=Side(style='thin', color='B4C6E7')
-        )
-    
+
+        # Corps standard styling - matching your spreadsheet. Kept as plain
+        # dicts so each workbook can register them as xlsxwriter formats.
+        self.header_format = {
+            'bg_color': '#4472C4', 'font_color': '#FFFFFF', 'bold': True,
+            'font_name': 'Calibri', 'font_size': 11,
+            'align': 'left', 'valign': 'vcenter',
+            'border': 1, 'border_color': '#B4C6E7',
+        }
+        self.blue_format = {
+            'bg_color': '#D9E2F3',
+            'font_name': 'Calibri', 'font_size': 11,
+            'align': 'left', 'valign': 'vcenter',
+            'border': 1, 'border_color': '#B4C6E7',
+        }
+        self.white_format = {
+            'bg_color': '#FFFFFF',
+            'font_name': 'Calibri', 'font_size': 11,
+            'align': 'left', 'valign': 'vcenter',
+            'border': 1, 'border_color': '#B4C6E7',
+        }
+
     def clean_address_data(self, df):
         """Clean address data to be single-line"""
         if 'Address' in df.columns:
             print("  Cleaning address data for single-line display...")
-            df['Address'] = df['Address'].astype(str).str.replace('\n', ' ').str.replace('\r', ' ')
-            df['Address'] = df['Address'].str.replace(r'\s+', ' ', regex=True)  # Multiple spaces to single space
-            df['Address'] = df['Address'].str.strip()
+            df['Address'] = (df['Address'].astype(str).str.translate(_NL_TR)
+                             .str.replace(_WS_RE, ' ', regex=True)  # Multiple spaces to single space
+                             .str.strip())
             print("  ✓ Address data cleaned")
-        
+
         if 'City State Zip' in df.columns:
             print("  Cleaning City State Zip data...")
-            df['City State Zip'] = df['City State Zip'].astype(str).str.replace('\n', ' ').str.replace('\r', ' ')
-            df['City State Zip'] = df['City State Zip'].str.replace(r'\s+', ' ', regex=True)
-            df['City State Zip'] = df['City State Zip'].str.strip()
+            df['City State Zip'] = (df['City State Zip'].astype(str).str.translate(_NL_TR)
+                                    .str.replace(_WS_RE, ' ', regex=True)
+                                    .str.strip())
             print("  ✓ City State Zip data cleaned")
         
         return df
@@ -48,16 +95,14 @@ class CorpsFormatter:
         print(f"Loading {filepath}...")
         
         try:
-            # Load all sheets to understand structure
-            xl_file = pd.ExcelFile(filepath)
-            print(f"  Found sheets: {', '.join(xl_file.sheet_names)}")
-            
-            # Load the main data sheet (usually first or 'Full Data')
-            if 'Full Data' in xl_file.sheet_names:
-                df = pd.read_excel(filepath, sheet_name='Full Data')
+            # Stream the main data sheet (usually first or 'Full Data')
+            # instead of letting pandas build the whole workbook DOM
+            df, sheet_names = _read_excel_fast(filepath, sheet_name='Full Data')
+            print(f"  Found sheets: {', '.join(sheet_names)}")
+
+            if 'Full Data' in sheet_names:
                 print(f"  ✓ Loaded 'Full Data' sheet with {len(df):,} rows and {len(df.columns)} columns")
             else:
-                df = pd.read_excel(filepath, sheet_name=0)
                 print(f"  ✓ Loaded first sheet with {len(df):,} rows and {len(df.columns)} columns")
             
             print(f"  Columns found: {', '.join(df.columns.tolist())}")
@@ -71,69 +116,6 @@ class CorpsFormatter:
             print(f"  ✗ Error: {e}")
             return None
     
-    def apply_corps_formatting_to_all_columns(self, worksheet):
-        """Apply Corps formatting to ALL columns in the worksheet"""
-        
-        print(f"Applying Corps formatting to {worksheet.max_column} columns...")
-        
-        # Auto-adjust column widths based on content
-        for col_num in range(1, worksheet.max_column + 1):
-            col_letter = worksheet.cell(row=1, column=col_num).column_letter
-            
-            # Set minimum and maximum widths
-            max_length = 0
-            
-            # Check header
-            header_length = len(str(worksheet.cell(row=1, column=col_num).value or ''))
-            max_length = max(max_length, header_length)
-            
-            # Sample first 100 rows for width
-            for row_num in range(2, min(102, worksheet.max_row + 1)):
-                cell_value = worksheet.cell(row=row_num, column=col_num).value
-                if cell_value:
-                    max_length = max(max_length, len(str(cell_value)))
-            
-            # Set width with min/max limits
-            adjusted_width = min(max(max_length + 2, 10), 50)
-            worksheet.column_dimensions[col_letter].width = adjusted_width
-        
-        # Format header row (all columns)
-        for col_num in range(1, worksheet.max_column + 1):
-            cell = worksheet.cell(row=1, column=col_num)
-            cell.fill = self.header_fill
-            cell.font = self.header_font
-            cell.alignment = Alignment(horizontal='left', vertical='center')
-            cell.border = self.thin_border
-        
-        # Apply alternating row colors to ALL columns
-        print(f"  Applying alternating row colors to {worksheet.max_row - 1} data rows...")
-        for row_num in range(2, worksheet.max_row + 1):
-            # Alternating blue/white rows
-            fill = self.light_blue_fill if row_num % 2 == 0 else self.white_fill
-            
-            for col_num in range(1, worksheet.max_column + 1):
-                cell = worksheet.cell(row=row_num, column=col_num)
-                cell.fill = fill
-                cell.font = self.cell_font
-                cell.border = self.thin_border
-                
-                # Special handling for Address column - no text wrapping, single line
-                # Check if this is the Address column by looking at the header
-                header_value = str(worksheet.cell(row=1, column=col_num).value or '').lower()
-                if 'address' in header_value:
-                    cell.alignment = Alignment(horizontal='left', vertical='center', wrap_text=False)
-                else:
-                    cell.alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
-        
-        print(f"  ✓ Applied alternating colors: {self.light_blue_fill.start_color} and {self.white_fill.start_color}")
-        
-        # Set row heights
-        worksheet.row_dimensions[1].height = 30  # Header row
-        for row_num in range(2, worksheet.max_row + 1):
-            worksheet.row_dimensions[row_num].height = 20
-        
-        print("  ✓ Formatting applied to all columns")
-    
     def create_formatted_output(self, df, output_filename=None):
         """Create output with consistent formatting across all columns"""
         
@@ -141,52 +123,66 @@ class CorpsFormatter:
             output_filename = f'Corps_10-2-25_FORMATTED_{self.timestamp}.xlsx'
         
         print(f"\nCreating formatted output: {output_filename}")
-        
-        # Save to Excel
-        with pd.ExcelWriter(output_filename, engine='openpyxl') as writer:
-            # Main sheet with ALL columns
-            df.to_excel(writer, sheet_name='Full Data', index=False)
-            
-            # Create Corps view (4 main columns only)
-            corps_columns = ['Company', 'Officer', 'Address', 'City State Zip']
-            corps_view = df[corps_columns].copy() if all(col in df.columns for col in corps_columns) else df.iloc[:, :4]
-            corps_view.to_excel(writer, sheet_name='Corps View', index=False)
-            
-            # Statistics
-            stats_data = []
-            stats_data.append(['Total Rows', f"{len(df):,}"])
-            stats_data.append(['Total Columns', f"{len(df.columns)}"])
-            
-            # Count filled data for key columns if they exist
-            if 'Officer' in df.columns:
-                filled_officer = len(df[df['Officer'].notna() & (df['Officer'] != '')])
-                stats_data.append(['Rows with Officer Data', f"{filled_officer:,} ({filled_officer/len(df)*100:.1f}%)"])
-            
-            if 'Address' in df.columns:
-                filled_address = len(df[df['Address'].notna() & (df['Address'] != '')])
-                stats_data.append(['Rows with Address Data', f"{filled_address:,} ({filled_address/len(df)*100:.1f}%)"])
-            
-            stats_data.append(['Processing Date', datetime.now().strftime('%Y-%m-%d %H:%M:%S')])
-            
-            stats_df = pd.DataFrame(stats_data, columns=['Metric', 'Value'])
-            stats_df.to_excel(writer, sheet_name='Statistics', index=False)
-        
-        # Load and format the workbook
-        wb = load_workbook(output_filename)
-        
-        # Format the Full Data sheet (all columns)
-        ws_full = wb['Full Data']
-        self.apply_corps_formatting_to_all_columns(ws_full)
-        
-        # Format the Corps View sheet
-        ws_corps = wb['Corps View']
-        self.apply_corps_formatting_to_all_columns(ws_corps)
-        
-        # Save formatted workbook
-        wb.save(output_filename)
-        
+
+        # Create Corps view (4 main columns only)
+        corps_columns = ['Company', 'Officer', 'Address', 'City State Zip']
+        # No .copy() — corps_view is only ever read (width measurement and
+        # to_excel), so duplicating four columns of data buys nothing
+        corps_view = df[corps_columns] if all(col in df.columns for col in corps_columns) else df.iloc[:, :4]
+
+        # Statistics
+        stats_data = []
+        stats_data.append(['Total Rows', f"{len(df):,}"])
+        stats_data.append(['Total Columns', f"{len(df.columns)}"])
+
+        # Count filled data for key columns if they exist (summing the
+        # boolean mask avoids materializing a filtered frame just for len)
+        if 'Officer' in df.columns:
+            filled_officer = int((df['Officer'].notna() & df['Officer'].ne('')).sum())
+            stats_data.append(['Rows with Officer Data', f"{filled_officer:,} ({filled_officer/len(df)*100:.1f}%)"])
+
+        if 'Address' in df.columns:
+            filled_address = int((df['Address'].notna() & df['Address'].ne('')).sum())
+            stats_data.append(['Rows with Address Data', f"{filled_address:,} ({filled_address/len(df)*100:.1f}%)"])
+
+        stats_data.append(['Processing Date', datetime.now().strftime('%Y-%m-%d %H:%M:%S')])
+
+        stats_df = pd.DataFrame(stats_data, columns=['Metric', 'Value'])
+
+        # xlsxwriter writes each sheet in one streaming pass and applies
+        # the alternating colors as row-level formats (format ids, not
+        # per-cell style objects), so there is no reload round trip
+        with pd.ExcelWriter(output_filename, engine='xlsxwriter') as writer:
+            workbook = writer.book
+            header_fmt = workbook.add_format(self.header_format)
+            blue_fmt = workbook.add_format(self.blue_format)
+            white_fmt = workbook.add_format(self.white_format)
+
+            for sheet_name, frame, formatted in (('Full Data', df, True),
+                                                 ('Corps View', corps_view, True),
+                                                 ('Statistics', stats_df, False)):
+                frame.to_excel(writer, sheet_name=sheet_name, index=False,
+                               header=False, startrow=1)
+                worksheet = writer.sheets[sheet_name]
+
+                for i, width in enumerate(_column_widths(frame)):
+                    worksheet.set_column(i, i, width)
+
+                worksheet.write_row(0, 0, [str(col) for col in frame.columns], header_fmt)
+                # One sheet-wide default height instead of a custom height
+                # attribute stamped onto every single row; only the header
+                # row keeps an explicit height
+                worksheet.set_default_row(20)
+                worksheet.set_row(0, 30)  # Header row
+
+                if formatted:
+                    print(f"  Formatting {len(frame):,} rows on '{sheet_name}'...")
+                    for row_num in range(1, len(frame) + 1):
+                        worksheet.set_row(row_num, None,
+                                          blue_fmt if row_num % 2 == 1 else white_fmt)
+
         print(f"  ✓ Saved: {output_filename}")
-        
+
         return output_filename
     
     def process_files(self, file1, file2=None):
@@ -1,11 +1,15 @@
 import pandas as pd
 import numpy as np
-from fuzzywuzzy import fuzz, process
+from rapidfuzz import fuzz, process
 import re
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+# Pre-compiled patterns shared by the scalar and vectorized cleaners
+_CLEAN_RE = re.compile(r'[^\w\s\.&]')
+_WS_RE = re.compile(r'\s+')
+
 class QuickDocumentMatcher:
     """Quick document number matcher with progress tracking"""
     
@@ -23,99 +27,68 @@ class QuickDocumentMatcher:
         
         # Only normalize spaces and special characters, keep all suffixes and full names
         # Remove extra special characters but keep common business characters
-        name = re.sub(r'[^\w\s\.&]', ' ', name)
+        name = _CLEAN_RE.sub(' ', name)
         # Normalize multiple spaces to single space
         name = ' '.join(name.split())
-        
+
         return name
-    
+
+    def clean_company_name_series(self, names):
+        """Vectorized clean_company_name for a whole Series
+
+        Same normalization, but run as C-level column passes instead of
+        one Python call per row via .apply.
+        """
+        cleaned = names.fillna('').astype(str).str.upper().str.strip()
+        cleaned = cleaned.str.replace(_CLEAN_RE, ' ', regex=True)
+        cleaned = cleaned.str.replace(_WS_RE, ' ', regex=True)
+        return cleaned.str.strip()
+
     def load_sample_data(self, companies_file, officers_file, sample_size=100):
         """Load a sample of data for quick testing"""
         print(f"Loading sample of {sample_size} companies...")
         
         # Load sample companies
         companies_df = pd.read_excel(companies_file, nrows=sample_size)
-        companies_df['clean_name'] = companies_df['Company'].apply(self.clean_company_name)
-        
+        companies_df['clean_name'] = self.clean_company_name_series(companies_df['Company'])
+
         print(f"Loading sample officers data...")
         # Load sample officers data
         officers_df = pd.read_csv(officers_file, nrows=10000)  # Load 10k officers for matching
-        officers_df['clean_name'] = officers_df['company_name'].apply(self.clean_company_name)
+        officers_df['clean_name'] = self.clean_company_name_series(officers_df['company_name'])
         
         return companies_df, officers_df
     
     def find_matches_quick(self, companies_df, officers_df):
         """Quick matching with progress tracking"""
-        matches = []
         total = len(companies_df)
-        
+
         print(f"Processing {total} companies...")
         print("=" * 50)
-        
-        # Create a lookup dictionary for faster matching
-        officer_lookup = {}
-        for _, row in officers_df.iterrows():
-            clean_name = row['clean_name']
-            if clean_name not in officer_lookup:
-                officer_lookup[clean_name] = []
-            officer_lookup[clean_name].append({
-                'doc_number': row['doc_number'],
-                'company_name': row['company_name']
-            })
-        
-        for idx, company_row in companies_df.iterrows():
-            if idx % 10 == 0:  # Show progress every 10 companies
-                print(f"Progress: {idx+1}/{total} ({(idx+1)/total*100:.1f}%)")
-            
-            company_name = company_row['clean_name']
-            original_name = company_row['Company']
-            
-            if not company_name:
-                matches.append({
-                    'original_company': original_name,
-                    'document_number': '',
-                    'similarity_score': 0,
-                    'match_quality': 'No Match'
-                })
-                continue
-            
-            # Try exact match first
-            if company_name in officer_lookup:
-                best_match = officer_lookup[company_name][0]
+
+        # Exact matches as one vectorized hash join: first officer per clean
+        # name, merged onto the companies frame. Replaces the iterrows()
+        # lookup build and the per-company Python loop.
+        officers_first = officers_df.drop_duplicates('clean_name', keep='first')
+        merged = companies_df[['Company', 'clean_name']].merge(
+            officers_first[['clean_name', 'doc_number', 'company_name']],
+            on='clean_name', how='left'
+        )
+        exact_mask = merged['doc_number'].notna() & (merged['clean_name'] != '')
+        print(f"Exact matches: {int(exact_mask.sum()):,}/{total}")
+
+        matches = []
+        for original_name, doc_number, matched_name, is_exact in zip(
+                merged['Company'], merged['doc_number'],
+                merged['company_name'], exact_mask):
+            if is_exact:
                 matches.append({
                     'original_company': original_name,
-                    'matched_company': best_match['company_name'],
-                    'document_number': best_match['doc_number'],
+                    'matched_company': matched_name,
+                    'document_number': doc_number,
                     'similarity_score': 100,
                     'match_quality': 'Exact Match'
                 })
-                continue
-            
-            # Try fuzzy matching with a subset of officers
-            # Sample officers for fuzzy matching to speed up
-            sample_officers = officers_df.sample(min(1000, len(officers_df)))
-            officer_names = sample_officers['clean_name'].tolist()
-            
-            # Get best fuzzy match
-            best_match = process.extractOne(
-                company_name, 
-                officer_names, 
-                scorer=fuzz.ratio
-            )
-            
-            if best_match and best_match[1] >= self.match_threshold:
-                # Find the document number for the best match
-                matched_officer = sample_officers[
-                    sample_officers['clean_name'] == best_match[0]
-                ].iloc[0]
-                
-                matches.append({
-                    'original_company': original_name,
-                    'matched_company': matched_officer['company_name'],
-                    'document_number': matched_officer['doc_number'],
-                    'similarity_score': best_match[1],
-                    'match_quality': self.get_match_quality(best_match[1])
-                })
             else:
                 matches.append({
                     'original_company': original_name,
@@ -124,7 +97,31 @@ class QuickDocumentMatcher:
                     'similarity_score': 0,
                     'match_quality': 'No Match'
                 })
-        
+
+        # Fuzzy matching only runs on the residual: non-empty names the
+        # exact join didn't resolve
+        residual_mask = (~exact_mask & (merged['clean_name'] != '')).to_numpy()
+        fuzzy_positions = np.flatnonzero(residual_mask)
+        fuzzy_queries = merged.loc[residual_mask, 'clean_name'].tolist()
+        officer_names = officers_df['clean_name'].tolist()
+
+        if fuzzy_queries:
+            print(f"Fuzzy matching {len(fuzzy_queries)} companies against {len(officer_names):,} officers...")
+            scores = process.cdist(fuzzy_queries, officer_names,
+                                   scorer=fuzz.ratio, dtype=np.uint8, workers=-1)
+            best_idx = scores.argmax(axis=1)
+            best_score = scores.max(axis=1)
+
+            for pos, officer_idx, score in zip(fuzzy_positions, best_idx, best_score):
+                if score >= self.match_threshold:
+                    matched_officer = officers_df.iloc[int(officer_idx)]
+                    matches[pos].update({
+                        'matched_company': matched_officer['company_name'],
+                        'document_number': matched_officer['doc_number'],
+                        'similarity_score': int(score),
+                        'match_quality': self.get_match_quality(int(score))
+                    })
+
         return matches
     
     def get_match_quality(self, score):